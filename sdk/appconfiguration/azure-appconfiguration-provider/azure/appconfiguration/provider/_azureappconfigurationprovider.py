@@ -121,6 +121,10 @@ def load(  # pylint: disable=docstring-keyword-should-match-keyword-only
     :keyword replica_discovery_enabled: Optional flag to enable or disable the discovery of replica endpoints. Default
      is True.
     :paramtype replica_discovery_enabled: bool
+    :keyword etag_cache_path: Optional path to a file used to persist the refresh sentinel etags across restarts.
+     When set, the first refresh after a restart reuses the persisted etags instead of re-downloading unchanged
+     configuration.
+    :paramtype etag_cache_path: Optional[str]
     """
 
 
@@ -179,6 +183,10 @@ def load(  # pylint: disable=docstring-keyword-should-match-keyword-only
     :keyword replica_discovery_enabled: Optional flag to enable or disable the discovery of replica endpoints. Default
      is True.
     :paramtype replica_discovery_enabled: bool
+    :keyword etag_cache_path: Optional path to a file used to persist the refresh sentinel etags across restarts.
+     When set, the first refresh after a restart reuses the persisted etags instead of re-downloading unchanged
+     configuration.
+    :paramtype etag_cache_path: Optional[str]
     """
 
 
@@ -528,9 +536,8 @@ class AzureAppConfigurationProvider(Mapping[str, Union[str, JSON]]):  # pylint:
         exception: Exception = RuntimeError(error_message)
         try:
             self._replica_client_manager.refresh_clients()
-            active_clients = self._replica_client_manager.get_active_clients()
 
-            for client in active_clients:
+            for client in self._replica_client_manager.iter_active_clients():
                 try:
                     if self._refresh_on:
                         headers = _get_headers(
@@ -555,6 +562,7 @@ class AzureAppConfigurationProvider(Mapping[str, Union[str, JSON]]):  # pylint:
                             ]
                         if need_refresh:
                             self._dict = configuration_settings_processed
+                            self._replica_client_manager.save_sentinel_etags(self._refresh_on)
                     if self._feature_flag_refresh_enabled:
                         headers = _get_headers(
                             kwargs.pop("headers", {}),
@@ -594,9 +602,11 @@ class AzureAppConfigurationProvider(Mapping[str, Union[str, JSON]]):  # pylint:
             self._refresh_lock.release()
 
     def _load_all(self, **kwargs):
-        active_clients = self._replica_client_manager.get_active_clients()
+        # Seed the sentinel etags from the on-disk cache, if one is configured, so unchanged settings are not
+        # re-fetched after a restart.
+        self._refresh_on = self._replica_client_manager.load_cached_sentinel_etags(self._refresh_on)
 
-        for client in active_clients:
+        for client in self._replica_client_manager.iter_active_clients():
             try:
                 configuration_settings, sentinel_keys = client.load_configuration_settings(
                     self._selects, self._refresh_on, **kwargs
@@ -637,6 +647,7 @@ class AzureAppConfigurationProvider(Mapping[str, Union[str, JSON]]):  # pylint:
                 with self._update_lock:
                     self._refresh_on = sentinel_keys
                     self._dict = configuration_settings_processed
+                self._replica_client_manager.save_sentinel_etags(self._refresh_on)
                 return
             except AzureError:
                 self._replica_client_manager.backoff(client)
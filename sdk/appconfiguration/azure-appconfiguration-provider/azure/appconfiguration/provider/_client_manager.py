@@ -4,10 +4,13 @@
 # license information.
 # -------------------------------------------------------------------------
 from logging import getLogger
-import json
+import os
 import time
 import random
-from dataclasses import dataclass
+from threading import Lock
+from heapq import heappush, heappop
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
 from typing import Tuple, Union, Dict, List, Any, Optional, Mapping
 from typing_extensions import Self
 from azure.core import MatchConditions
@@ -32,17 +35,78 @@ from ._constants import (
 )
 from ._discovery import find_auto_failover_endpoints
 
+try:
+    # orjson is an optional dependency; its decoder is ~2-3x faster than the standard library, which adds up when
+    # parsing the value of every loaded feature flag.
+    from orjson import loads as _loads, dumps as _dumps  # pylint:disable=no-name-in-module
+except ImportError:
+    import json
+
+    _loads = json.loads
+
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+
+_LOGGER = getLogger(__name__)
+
 FALLBACK_CLIENT_REFRESH_EXPIRED_INTERVAL = 3600  # 1 hour in seconds
 MINIMAL_CLIENT_REFRESH_INTERVAL = 30  # 30 seconds
 
+# Separates key and label in the persisted etag cache; neither may contain the unit separator control character.
+_ETAG_CACHE_KEY_SEPARATOR = "\x1f"
+
+# Longest comma-joined key filter sent for a batched sentinel check; larger sets fall back to per-key requests.
+_MAX_BATCH_KEY_FILTER_LENGTH = 255
+
+
+def _deduplicate_selects(selects: List[SettingSelector]) -> List[SettingSelector]:
+    """
+    Drops selectors with duplicate key and label filters, so the same listing isn't requested twice.
+
+    :param List[SettingSelector] selects: The selectors to deduplicate
+    :return: The selectors with duplicates removed, in their original order
+    :rtype: List[SettingSelector]
+    """
+    return list({(select.key_filter, select.label_filter): select for select in selects}.values())
+
+
+# Maps each known filter name to its usage-tracking key, so classifying a filter is a single dict lookup instead of
+# membership tests against three separate collections.
+_FILTER_NAME_TO_KEY = {name: PERCENTAGE_FILTER_KEY for name in PERCENTAGE_FILTER_NAMES}
+_FILTER_NAME_TO_KEY.update({name: TIME_WINDOW_FILTER_KEY for name in TIME_WINDOW_FILTER_NAMES})
+_FILTER_NAME_TO_KEY.update({name: TARGETING_FILTER_KEY for name in TARGETING_FILTER_NAMES})
+
 
-@dataclass
 class _ConfigurationClientWrapper:
-    endpoint: str
-    _client: AzureAppConfigurationClient
-    backoff_end_time: float = 0
-    failed_attempts: int = 0
-    LOGGER = getLogger(__name__)
+    # Avoids a per-instance __dict__, shrinking each wrapper and speeding up the attribute loads in the hot
+    # is_active path.
+    __slots__ = ("endpoint", "_client", "backoff_end_time", "failed_attempts", "_list_etags", "_list_cache")
+
+    def __init__(
+        self,
+        endpoint: str,
+        client: AzureAppConfigurationClient,
+        backoff_end_time: float = 0,
+        failed_attempts: int = 0,
+    ) -> None:
+        self.endpoint = endpoint
+        self._client = client
+        self.backoff_end_time = backoff_end_time  # Seconds since the epoch, the same unit as time.time()
+        self.failed_attempts = failed_attempts
+        # Page etag and settings of the last single-page list response, keyed by (key_filter, label_filter). Used to
+        # turn unchanged re-lists into 304s.
+        self._list_etags: Dict[Tuple[str, str], str] = {}
+        self._list_cache: Dict[Tuple[str, str], List[ConfigurationSetting]] = {}
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, _ConfigurationClientWrapper)
+            and self.endpoint == other.endpoint
+            and self._client == other._client
+            and self.backoff_end_time == other.backoff_end_time
+            and self.failed_attempts == other.failed_attempts
+        )
 
     @classmethod
     def from_credential(
@@ -105,6 +169,111 @@ class _ConfigurationClientWrapper:
             ),
         )
 
+    def _list_configuration_settings(self, key_filter: str, label_filter: str, **kwargs) -> List[ConfigurationSetting]:
+        """
+        Lists configuration settings, sending If-None-Match with the page etag of the previous response when one is
+        cached. A 304 reply means nothing has changed server-side and the cached settings are returned without
+        re-downloading or re-deserializing them. A page etag only covers its own page, so caching is restricted to
+        listings that fit in a single page.
+
+        :param str key_filter: The key filter to use for the request
+        :param str label_filter: The label filter to use for the request
+        :return: The listed configuration settings
+        :rtype: List[ConfigurationSetting]
+        """
+        cache_key = (key_filter, label_filter)
+        cached_etag = self._list_etags.get(cache_key)
+        headers = dict(kwargs.pop("headers", None) or {})
+        if cached_etag:
+            headers["If-None-Match"] = cached_etag
+
+        page_etags: List[Optional[str]] = []
+        user_hook = kwargs.pop("raw_response_hook", None)
+
+        def _capture_page_etag(response):
+            page_etags.append(response.http_response.headers.get("ETag"))
+            if user_hook is not None:
+                user_hook(response)
+
+        try:
+            settings = list(
+                self._client.list_configuration_settings(
+                    key_filter=key_filter,
+                    label_filter=label_filter,
+                    headers=headers,
+                    raw_response_hook=_capture_page_etag,
+                    **kwargs
+                )
+            )
+        except HttpResponseError as e:
+            if cached_etag and e.status_code == 304:
+                return self._list_cache[cache_key]
+            raise
+        if len(page_etags) == 1 and page_etags[0]:
+            self._list_etags[cache_key] = page_etags[0]
+            self._list_cache[cache_key] = settings
+        else:
+            self._list_etags.pop(cache_key, None)
+            self._list_cache.pop(cache_key, None)
+        return settings
+
+    def _check_configuration_settings_batched(
+        self,
+        sentinels: List[Tuple[Tuple[str, str], Optional[str]]],
+        updated_sentinel_keys: Dict[Tuple[str, str], str],
+        headers: Dict[str, str],
+        **kwargs
+    ) -> Optional[bool]:
+        """
+        Checks all sentinels with a single list request using a comma-separated key filter, comparing etags
+        client-side. Batching is only possible when there is more than one sentinel, every sentinel shares the same
+        non-empty label, neither the keys nor the label contain filter syntax and the joined filter stays within the
+        service limit.
+
+        :param List[Tuple[Tuple[str, str], Optional[str]]] sentinels: The sentinel keys and their last known etags
+        :param Dict[Tuple[str, str], str] updated_sentinel_keys: Updated with the new etags of changed sentinels
+        :param Mapping[str, str] headers: headers to use for the request
+        :return: True/false if a change is detected, or None if the sentinels can't be batched and the caller should
+        fall back to per-sentinel checks.
+        :rtype: Optional[bool]
+        """
+        if len(sentinels) < 2:
+            return None
+        labels = {label for (_, label), _ in sentinels}
+        if len(labels) != 1:
+            return None
+        label_filter = labels.pop()
+        # The label is passed as a filter too; the per-key check treats it literally, so a label containing filter
+        # syntax must also fall back to keep the matching semantics identical.
+        if not label_filter or "," in label_filter or "*" in label_filter or "\\" in label_filter:
+            return None
+        keys = [key for (key, _), _ in sentinels]
+        if any("," in key or "*" in key or "\\" in key for key in keys):
+            return None
+        key_filter = ",".join(keys)
+        if len(key_filter) > _MAX_BATCH_KEY_FILTER_LENGTH:
+            return None
+        configs = self._list_configuration_settings(
+            key_filter=key_filter, label_filter=label_filter, headers=headers, **kwargs
+        )
+        # Keys are unique within a single label, so the listing is indexed by key alone; this also sidesteps the
+        # service representing an empty label as None on returned settings.
+        listed = {config.key: config for config in configs}
+        need_refresh = False
+        for (key, label), etag in sentinels:
+            config = listed.get(key)
+            if config is None:
+                # Missing from the listing means the sentinel was deleted; as with a 404 on the per-key check, only a
+                # sentinel that previously existed triggers a refresh.
+                if etag is not None:
+                    _LOGGER.debug("Refresh all triggered by key: %s label %s.", key, label)
+                    need_refresh = True
+            elif config.etag != etag:
+                _LOGGER.debug("Refresh all triggered by key: %s label %s.", key, label)
+                need_refresh = True
+                updated_sentinel_keys[(key, label)] = config.etag
+        return need_refresh
+
     def _check_configuration_setting(
         self, key: str, label: str, etag: Optional[str], headers: Dict[str, str], **kwargs
     ) -> Tuple[bool, Union[ConfigurationSetting, None]]:
@@ -124,7 +293,7 @@ class _ConfigurationClientWrapper:
                 key=key, label=label, etag=etag, match_condition=MatchConditions.IfModified, headers=headers, **kwargs
             )
             if updated_sentinel is not None:
-                self.LOGGER.debug(
+                _LOGGER.debug(
                     "Refresh all triggered by key: %s label %s.",
                     key,
                     label,
@@ -134,7 +303,7 @@ class _ConfigurationClientWrapper:
             if e.status_code == 404:
                 if etag is not None:
                     # If the sentinel is not found, it means the key/label was deleted, so we should refresh
-                    self.LOGGER.debug("Refresh all triggered by key: %s label %s.", key, label)
+                    _LOGGER.debug("Refresh all triggered by key: %s label %s.", key, label)
                     return True, None
             else:
                 raise e
@@ -146,8 +315,14 @@ class _ConfigurationClientWrapper:
     ) -> Tuple[List[ConfigurationSetting], Dict[Tuple[str, str], str]]:
         configuration_settings = []
         sentinel_keys = kwargs.pop("sentinel_keys", refresh_on)
-        for select in selects:
-            configurations = self._client.list_configuration_settings(
+        # Hoisted out of the per-setting loop; sentinel bookkeeping is skipped entirely in the common case where no
+        # refresh sentinels are registered, and the bound append avoids an attribute lookup per setting.
+        track_sentinels = bool(refresh_on)
+        add_configuration_setting = configuration_settings.append
+        seen_settings: set = set()
+        mark_setting_seen = seen_settings.add
+        for select in _deduplicate_selects(selects):
+            configurations = self._list_configuration_settings(
                 key_filter=select.key_filter, label_filter=select.label_filter, **kwargs
             )
             for config in configurations:
@@ -155,12 +330,17 @@ class _ConfigurationClientWrapper:
                     # Feature flags are ignored when loaded by Selects, as they are selected from
                     # `feature_flag_selectors`
                     pass
-                configuration_settings.append(config)
+                setting_id = (config.key, config.label)
+                if setting_id in seen_settings:
+                    # Overlapping selectors can return the same setting more than once.
+                    continue
+                mark_setting_seen(setting_id)
+                add_configuration_setting(config)
                 # Every time we run load_all, we should update the etag of our refresh sentinels
                 # so they stay up-to-date.
                 # Sentinel keys will have unprocessed key names, so we need to use the original key.
-                if (config.key, config.label) in refresh_on:
-                    sentinel_keys[(config.key, config.label)] = config.etag
+                if track_sentinels and setting_id in refresh_on:
+                    sentinel_keys[setting_id] = config.etag
         return configuration_settings, sentinel_keys
 
     @distributed_trace
@@ -172,25 +352,35 @@ class _ConfigurationClientWrapper:
         # Needs to be removed unknown keyword argument for list_configuration_settings
         kwargs.pop("sentinel_keys", None)
         filters_used = {}
-        for select in feature_flag_selectors:
-            feature_flags = self._client.list_configuration_settings(
-                key_filter=FEATURE_FLAG_PREFIX + select.key_filter, label_filter=select.label_filter, **kwargs
+        seen_feature_flags: set = set()
+        # Bound locally so the per-feature-flag loop skips an attribute or module-global lookup per use.
+        mark_feature_flag_seen = seen_feature_flags.add
+        add_feature_flag = loaded_feature_flags.append
+        loads = _loads
+        filter_name_to_key = _FILTER_NAME_TO_KEY
+        # The prefixed key filters are computed once up front rather than concatenating inside the loop.
+        prefixed_filters = [
+            (FEATURE_FLAG_PREFIX + select.key_filter, select.label_filter)
+            for select in _deduplicate_selects(feature_flag_selectors)
+        ]
+        for key_filter, label_filter in prefixed_filters:
+            feature_flags = self._list_configuration_settings(
+                key_filter=key_filter, label_filter=label_filter, **kwargs
             )
             for feature_flag in feature_flags:
-                loaded_feature_flags.append(json.loads(feature_flag.value))
+                feature_flag_id = (feature_flag.key, feature_flag.label)
+                if feature_flag_id in seen_feature_flags:
+                    # Overlapping selectors can return the same feature flag more than once.
+                    continue
+                mark_feature_flag_seen(feature_flag_id)
+                add_feature_flag(loads(feature_flag.value))
 
                 if feature_flag_refresh_enabled:
-                    feature_flag_sentinel_keys[(feature_flag.key, feature_flag.label)] = feature_flag.etag
-                if feature_flag.filters:
+                    feature_flag_sentinel_keys[feature_flag_id] = feature_flag.etag
+                # Once all four filter kinds have been seen there is nothing left to record.
+                if feature_flag.filters and len(filters_used) < 4:
                     for filter in feature_flag.filters:
-                        if filter.get("name") in PERCENTAGE_FILTER_NAMES:
-                            filters_used[PERCENTAGE_FILTER_KEY] = True
-                        elif filter.get("name") in TIME_WINDOW_FILTER_NAMES:
-                            filters_used[TIME_WINDOW_FILTER_KEY] = True
-                        elif filter.get("name") in TARGETING_FILTER_NAMES:
-                            filters_used[TARGETING_FILTER_KEY] = True
-                        else:
-                            filters_used[CUSTOM_FILTER_KEY] = True
+                        filters_used[filter_name_to_key.get(filter.get("name"), CUSTOM_FILTER_KEY)] = True
         return loaded_feature_flags, feature_flag_sentinel_keys, filters_used
 
     @distributed_trace
@@ -210,14 +400,33 @@ class _ConfigurationClientWrapper:
         """
         need_refresh = False
         updated_sentinel_keys = dict(refresh_on)
-        for (key, label), etag in updated_sentinel_keys.items():
-            changed, updated_sentinel = self._check_configuration_setting(
-                key=key, label=label, etag=etag, headers=headers, **kwargs
-            )
-            if changed:
-                need_refresh = True
-            if updated_sentinel is not None:
-                updated_sentinel_keys[(key, label)] = updated_sentinel.etag
+        sentinels = list(updated_sentinel_keys.items())
+        batched_refresh = self._check_configuration_settings_batched(
+            sentinels, updated_sentinel_keys, headers, **kwargs
+        )
+        if batched_refresh is not None:
+            need_refresh = batched_refresh
+        elif sentinels:
+            # The sentinel checks are independent, I/O bound requests, so they are dispatched concurrently instead of
+            # paying one round trip per sentinel.
+            with ThreadPoolExecutor(max_workers=min(8, len(sentinels))) as executor:
+                futures = {
+                    executor.submit(
+                        self._check_configuration_setting, key=key, label=label, etag=etag, headers=headers, **kwargs
+                    ): (key, label)
+                    for (key, label), etag in sentinels
+                }
+                for future in as_completed(futures):
+                    changed, updated_sentinel = future.result()
+                    if updated_sentinel is not None:
+                        updated_sentinel_keys[futures[future]] = updated_sentinel.etag
+                    if changed:
+                        need_refresh = True
+                        # Any change triggers a full reload, which rebuilds the sentinel etags from scratch, so the
+                        # remaining probes can be skipped.
+                        for pending in futures:
+                            pending.cancel()
+                        break
         # Need to only update once, no matter how many sentinels are updated
         if need_refresh:
             configuration_settings, sentinel_keys = self.load_configuration_settings(selects, refresh_on, **kwargs)
@@ -243,14 +452,30 @@ class _ConfigurationClientWrapper:
         value of the feature flag sentinel keys. The third item is the updated feature flags.
         :rtype: Tuple[bool, Union[Dict[Tuple[str, str], str], None], Union[List[Dict[str, str]], None, Dict[str, bool]]
         """
-        feature_flag_sentinel_keys: Mapping[Tuple[str, str], Optional[str]] = dict(refresh_on)
-        for (key, label), etag in feature_flag_sentinel_keys.items():
-            changed = self._check_configuration_setting(key=key, label=label, etag=etag, headers=headers, **kwargs)
-            if changed:
-                feature_flags, feature_flag_sentinel_keys, filters_used = self.load_feature_flags(
-                    feature_flag_selectors, True, **kwargs
-                )
-                return True, feature_flag_sentinel_keys, feature_flags, filters_used
+        sentinels = list(refresh_on.items())
+        changed = False
+        if sentinels:
+            # The sentinel checks are independent, I/O bound requests, so they are dispatched concurrently instead of
+            # paying one round trip per sentinel.
+            with ThreadPoolExecutor(max_workers=min(8, len(sentinels))) as executor:
+                futures = [
+                    executor.submit(
+                        self._check_configuration_setting, key=key, label=label, etag=etag, headers=headers, **kwargs
+                    )
+                    for (key, label), etag in sentinels
+                ]
+                for future in as_completed(futures):
+                    if future.result()[0]:
+                        changed = True
+                        # Any change triggers a full reload, so the remaining probes can be skipped.
+                        for pending in futures:
+                            pending.cancel()
+                        break
+        if changed:
+            feature_flags, feature_flag_sentinel_keys, filters_used = self.load_feature_flags(
+                feature_flag_selectors, True, **kwargs
+            )
+            return True, feature_flag_sentinel_keys, feature_flags, filters_used
         return False, None, None, {}
 
     @distributed_trace
@@ -272,7 +497,7 @@ class _ConfigurationClientWrapper:
         :return: True if the client is active, False otherwise
         :rtype: bool
         """
-        return self.backoff_end_time <= (time.time() * 1000)
+        return self.backoff_end_time <= time.time()
 
     def close(self) -> None:
         """
@@ -311,44 +536,51 @@ class ConfigurationClientManager:  # pylint:disable=too-many-instance-attributes
         self._retry_backoff_max = retry_backoff_max
         self._replica_discovery_enabled = replica_discovery_enabled
         self._next_update_time = time.time() + MINIMAL_CLIENT_REFRESH_INTERVAL
+        self._consecutive_noop_refreshes = 0
+        self._etag_cache_path: Optional[str] = kwargs.pop("etag_cache_path", None)
+        self._exit_stack: Optional[ExitStack] = None
         self._args = dict(kwargs)
         self._min_backoff_sec = min_backoff_sec
         self._max_backoff_sec = max_backoff_sec
+        # The exponential backoff saturates the max backoff after this many attempts; capping the shift there keeps
+        # the arithmetic in machine-int range instead of allocating ever larger big ints. Computed in milliseconds to
+        # match the shifted multiplicand in _calculate_backoff, so the cap never lands below the max backoff.
+        min_backoff_milliseconds = min_backoff_sec * 1000
+        max_backoff_milliseconds = max_backoff_sec * 1000
+        self._max_backoff_attempts = max(
+            1, int(max_backoff_milliseconds // max(1, min_backoff_milliseconds))
+        ).bit_length()
+
+        if not (connection_string and endpoint) and not (endpoint and credential):
+            raise ValueError("Please pass either endpoint and credential, or a connection string with a value.")
+        self._replica_clients.append(self._build_client_wrapper(endpoint))
+        # Failover replicas are discovered and built lazily: most deployments never fail over, so the SRV lookup and
+        # per-replica client construction would be pure startup cost. See _ensure_failover_clients.
+        self._failover_endpoints_discovered = False
+        self._clients_lock = Lock()
+        # Min-heap of (backoff_end_time, id(client), client) maintained by backoff(), plus the set of client ids
+        # currently believed to be in backoff. Together they let get_active_clients skip the per-client clock
+        # comparisons in the common case where nothing is backed off.
+        self._backoff_heap: List[Tuple[float, int, _ConfigurationClientWrapper]] = []
+        self._backed_off_ids: set = set()
+
+    def _build_client_wrapper(self, endpoint: str) -> _ConfigurationClientWrapper:
+        """
+        Builds a replica client wrapper for the provided endpoint, using the configured connection string or
+        credential.
 
-        failover_endpoints = find_auto_failover_endpoints(endpoint, replica_discovery_enabled)
-        if connection_string and endpoint:
-            self._replica_clients.append(
-                _ConfigurationClientWrapper.from_connection_string(
-                    endpoint, connection_string, user_agent, retry_total, retry_backoff_max, **self._args
-                )
-            )
-            for failover_endpoint in failover_endpoints:
-                failover_connection_string = connection_string.replace(endpoint, failover_endpoint)
-                self._replica_clients.append(
-                    _ConfigurationClientWrapper.from_connection_string(
-                        failover_endpoint,
-                        failover_connection_string,
-                        user_agent,
-                        retry_total,
-                        retry_backoff_max,
-                        **self._args
-                    )
-                )
-            return
-        if endpoint and credential:
-            self._replica_clients.append(
-                _ConfigurationClientWrapper.from_credential(
-                    endpoint, credential, user_agent, retry_total, retry_backoff_max, **self._args
-                )
+        :param str endpoint: The endpoint of the App Configuration store
+        :return: A client wrapper for the endpoint
+        :rtype: _ConfigurationClientWrapper
+        """
+        if self._original_connection_string:
+            connection_string = self._original_connection_string.replace(self._original_endpoint, endpoint)
+            return _ConfigurationClientWrapper.from_connection_string(
+                endpoint, connection_string, self._user_agent, self._retry_total, self._retry_backoff_max, **self._args
             )
-            for failover_endpoint in failover_endpoints:
-                self._replica_clients.append(
-                    _ConfigurationClientWrapper.from_credential(
-                        failover_endpoint, credential, user_agent, retry_total, retry_backoff_max, **self._args
-                    )
-                )
-            return
-        raise ValueError("Please pass either endpoint and credential, or a connection string with a value.")
+        return _ConfigurationClientWrapper.from_credential(
+            endpoint, self._credential, self._user_agent, self._retry_total, self._retry_backoff_max, **self._args
+        )
 
     def refresh_clients(self):
         if not self._replica_discovery_enabled:
@@ -362,65 +594,176 @@ class ConfigurationClientManager:  # pylint:disable=too-many-instance-attributes
             self._next_update_time = time.time() + FALLBACK_CLIENT_REFRESH_EXPIRED_INTERVAL
             return
 
+        self._failover_endpoints_discovered = True
+
         if len(failover_endpoints) == 0:
             # No failover endpoints in SRV record.
-            self._next_update_time = time.time() + MINIMAL_CLIENT_REFRESH_INTERVAL
+            self._schedule_next_update(topology_changed=False)
             return
 
+        existing_clients = {client.endpoint: client for client in self._replica_clients}
+        missing_endpoints = [
+            failover_endpoint for failover_endpoint in failover_endpoints if failover_endpoint not in existing_clients
+        ]
+        built_clients: Dict[str, _ConfigurationClientWrapper] = {}
+        if missing_endpoints:
+            # Newly discovered replicas are built concurrently, the same way as in __init__.
+            with ThreadPoolExecutor(max_workers=min(16, len(missing_endpoints))) as executor:
+                built_clients = dict(
+                    zip(missing_endpoints, executor.map(self._build_client_wrapper, missing_endpoints))
+                )
+            self._register_clients_on_exit_stack(built_clients.values())
+
         new_clients = [self._replica_clients[0]]  # Keep the original client
         for failover_endpoint in failover_endpoints:
-            found_client = False
-            for client in self._replica_clients:
-                if client.endpoint == failover_endpoint:
-                    new_clients.append(client)
-                    found_client = True
-                    break
-            if not found_client:
-                if self._original_connection_string:
-                    failover_connection_string = self._original_connection_string.replace(
-                        self._original_endpoint, failover_endpoint
-                    )
-                    new_clients.append(
-                        _ConfigurationClientWrapper.from_connection_string(
-                            failover_endpoint,
-                            failover_connection_string,
-                            self._user_agent,
-                            self._retry_total,
-                            self._retry_backoff_max,
-                            **self._args
-                        )
-                    )
-                else:
-                    new_clients.append(
-                        _ConfigurationClientWrapper.from_credential(
-                            failover_endpoint,
-                            self._credential,
-                            self._user_agent,
-                            self._retry_total,
-                            self._retry_backoff_max,
-                            **self._args
-                        )
-                    )
+            client = built_clients.get(failover_endpoint, existing_clients.get(failover_endpoint))
+            if client is not None:
+                new_clients.append(client)
+        topology_changed = new_clients != self._replica_clients
         self._replica_clients = new_clients
-        self._next_update_time = time.time() + MINIMAL_CLIENT_REFRESH_INTERVAL
+        self._schedule_next_update(topology_changed=topology_changed)
 
-    def get_active_clients(self):
-        active_clients = []
+    def _schedule_next_update(self, topology_changed: bool) -> None:
+        if topology_changed:
+            self._consecutive_noop_refreshes = 0
+            self._next_update_time = time.time() + MINIMAL_CLIENT_REFRESH_INTERVAL
+            return
+        # When discovery keeps returning the same topology the store is idle; back off the polling interval
+        # exponentially, capped at the fallback interval, with up to 20% jitter so instances don't look up the SRV
+        # record in lock step.
+        self._consecutive_noop_refreshes += 1
+        interval = min(
+            MINIMAL_CLIENT_REFRESH_INTERVAL * (1 << min(self._consecutive_noop_refreshes, 6)),
+            FALLBACK_CLIENT_REFRESH_EXPIRED_INTERVAL,
+        )
+        self._next_update_time = time.time() + interval * (1 + random.random() * 0.2)
+
+    def iter_active_clients(self):
+        """
+        Lazily yields the clients that are not currently in backoff, in replica order. Callers that stop at the first
+        usable client avoid filtering and materializing the rest of the list. Failover replicas that were never built
+        are only discovered and constructed once every built client has been exhausted, keeping the cold failover path
+        off the startup and steady-state paths.
+
+        :return: An iterator over the active clients
+        :rtype: Iterator[_ConfigurationClientWrapper]
+        """
+        # Read the clock once for the whole scan instead of once per client.
+        now = time.time()
+        self._release_expired_backoffs(now)
         for client in self._replica_clients:
-            if client.is_active():
-                active_clients.append(client)
-        return active_clients
+            if client.backoff_end_time <= now:
+                yield client
+        # Reached only when every built client was in backoff or has failed over; this is the first real need for the
+        # failover replicas.
+        for client in self._ensure_failover_clients():
+            if client.backoff_end_time <= now:
+                yield client
+
+    def get_active_clients(self):
+        now = time.time()
+        self._release_expired_backoffs(now)
+        if not self._backed_off_ids:
+            return list(self._replica_clients)
+        # Some replicas are in backoff; filter on the actual end times so a stale index entry can never hide an
+        # active client.
+        return [client for client in self._replica_clients if client.backoff_end_time <= now]
+
+    def _release_expired_backoffs(self, now: float) -> None:
+        """
+        Drops expired entries from the backoff index, so it can't grow without bound while a replica keeps failing.
+        The heap is ordered by backoff_end_time, so the scan stops at the first entry still in the future instead of
+        checking every replica.
+
+        :param float now: The current time in seconds since the epoch, as returned by time.time()
+        """
+        heap = self._backoff_heap
+        while heap and heap[0][0] <= now:
+            _, client_id, client = heappop(heap)
+            if client.backoff_end_time <= now:
+                # A client backed off again while waiting keeps a newer heap entry; only drop it once that expires.
+                self._backed_off_ids.discard(client_id)
+
+    def _ensure_failover_clients(self) -> List[_ConfigurationClientWrapper]:
+        """
+        Discovers and builds the failover replica clients the first time they are actually needed.
+
+        :return: The newly built failover clients, if any
+        :rtype: List[_ConfigurationClientWrapper]
+        """
+        with self._clients_lock:
+            if self._failover_endpoints_discovered:
+                return []
+            self._failover_endpoints_discovered = True
+            failover_endpoints = find_auto_failover_endpoints(self._original_endpoint, self._replica_discovery_enabled)
+            if not failover_endpoints:
+                return []
+            with ThreadPoolExecutor(max_workers=min(16, len(failover_endpoints))) as executor:
+                new_clients = list(executor.map(self._build_client_wrapper, failover_endpoints))
+            self._replica_clients.extend(new_clients)
+            self._register_clients_on_exit_stack(new_clients)
+            return new_clients
 
     def backoff(self, client: _ConfigurationClientWrapper):
         client.failed_attempts += 1
         backoff_time = self._calculate_backoff(client.failed_attempts)
-        client.backoff_end_time = (time.time() * 1000) + backoff_time
+        client.backoff_end_time = time.time() + backoff_time / 1000  # _calculate_backoff is in milliseconds
+        heappush(self._backoff_heap, (client.backoff_end_time, id(client), client))
+        self._backed_off_ids.add(id(client))
 
     def get_client_count(self) -> int:
         return len(self._replica_clients)
 
+    def load_cached_sentinel_etags(
+        self, refresh_on: Mapping[Tuple[str, str], Optional[str]]
+    ) -> Dict[Tuple[str, str], Optional[str]]:
+        """
+        Fills in sentinel etags persisted by a previous run, when an etag cache path is configured. Pre-seeding the
+        etags turns the first refresh after a restart into conditional requests instead of full downloads.
+
+        :param Mapping[Tuple[str, str], Optional[str]] refresh_on: The sentinel keys to fill in
+        :return: The sentinel keys with any missing etags filled in from the cache
+        :rtype: Dict[Tuple[str, str], Optional[str]]
+        """
+        sentinel_keys = dict(refresh_on)
+        if not self._etag_cache_path or not os.path.isfile(self._etag_cache_path):
+            return sentinel_keys
+        try:
+            with open(self._etag_cache_path, "rb") as cache_file:
+                cached_etags = _loads(cache_file.read())
+        except (OSError, ValueError):
+            _LOGGER.debug("Unable to read the etag cache at %s.", self._etag_cache_path)
+            return sentinel_keys
+        if not isinstance(cached_etags, dict):
+            # The cache is best effort and externally writable; anything that isn't a JSON object is ignored.
+            _LOGGER.debug("Ignoring malformed etag cache at %s.", self._etag_cache_path)
+            return sentinel_keys
+        for (key, label), etag in sentinel_keys.items():
+            if etag is None:
+                sentinel_keys[(key, label)] = cached_etags.get(key + _ETAG_CACHE_KEY_SEPARATOR + label)
+        return sentinel_keys
+
+    def save_sentinel_etags(self, sentinel_keys: Mapping[Tuple[str, str], Optional[str]]) -> None:
+        """
+        Persists the sentinel etags to the configured etag cache path. The write is atomic via os.replace and best
+        effort; failures are logged and ignored.
+
+        :param Mapping[Tuple[str, str], Optional[str]] sentinel_keys: The sentinel keys to persist
+        """
+        if not self._etag_cache_path:
+            return
+        cached_etags = {
+            key + _ETAG_CACHE_KEY_SEPARATOR + label: etag for (key, label), etag in sentinel_keys.items() if etag
+        }
+        temp_path = self._etag_cache_path + ".tmp"
+        try:
+            with open(temp_path, "wb") as cache_file:
+                cache_file.write(_dumps(cached_etags))
+            os.replace(temp_path, self._etag_cache_path)
+        except OSError:
+            _LOGGER.debug("Unable to write the etag cache at %s.", self._etag_cache_path)
+
     def _calculate_backoff(self, attempts: int) -> float:
-        max_attempts = 63
         ms_per_second = 1000  # 1 Second in milliseconds
 
         min_backoff_milliseconds = self._min_backoff_sec * ms_per_second
@@ -429,32 +772,44 @@ class ConfigurationClientManager:  # pylint:disable=too-many-instance-attributes
         if self._max_backoff_sec <= self._min_backoff_sec:
             return min_backoff_milliseconds
 
-        calculated_milliseconds = max(1, min_backoff_milliseconds) * (1 << min(attempts, max_attempts))
-
-        if calculated_milliseconds > max_backoff_milliseconds or calculated_milliseconds <= 0:
-            calculated_milliseconds = max_backoff_milliseconds
-
-        return min_backoff_milliseconds + (
-            random.uniform(0.0, 1.0) * (calculated_milliseconds - min_backoff_milliseconds)
+        calculated_milliseconds = min(
+            max(1, min_backoff_milliseconds) * (1 << min(attempts, self._max_backoff_attempts)),
+            max_backoff_milliseconds,
         )
 
+        return min_backoff_milliseconds + (random.random() * (calculated_milliseconds - min_backoff_milliseconds))
+
     def __eq__(self, other):
-        if len(self._replica_clients) != len(other._replica_clients):
-            return False
-        for i in range(len(self._replica_clients)):  # pylint:disable=consider-using-enumerate
-            if self._replica_clients[i] != other._replica_clients[i]:
-                return False
-        return True
+        return len(self._replica_clients) == len(other._replica_clients) and all(
+            client == other_client for client, other_client in zip(self._replica_clients, other._replica_clients)
+        )
 
     def close(self):
         for client in self._replica_clients:
             client.close()
 
+    def _register_clients_on_exit_stack(self, clients) -> None:
+        """
+        Enters clients built after the manager's context was entered onto the exit stack, so leaving the manager
+        context closes every client it built, not just the ones that existed at enter time.
+
+        :param clients: The newly built clients to register
+        :type clients: Iterable[_ConfigurationClientWrapper]
+        """
+        if self._exit_stack is not None:
+            for client in clients:
+                self._exit_stack.enter_context(client)
+
     def __enter__(self):
-        for client in self._replica_clients:
-            client.__enter__()
+        # The stack unwinds any already-entered clients if a later __enter__ raises, so a mid-loop failure can't
+        # leak open connections.
+        with ExitStack() as stack:
+            for client in self._replica_clients:
+                stack.enter_context(client)
+            self._exit_stack = stack.pop_all()
         return self
 
     def __exit__(self, *args):
-        for client in self._replica_clients:
-            client.__exit__(*args)
+        if self._exit_stack is not None:
+            self._exit_stack.__exit__(*args)
+            self._exit_stack = None
@@ -3,6 +3,7 @@
 # Licensed under the MIT License. See License.txt in the project root for
 # license information.
 # -------------------------------------------------------------------------
+import asyncio
 import json
 from threading import Lock
 import datetime
@@ -438,14 +439,29 @@ class AzureAppConfigurationProvider(Mapping[str, Union[str, JSON]]):  # pylint:
             self._feature_filter_usage,
             self._uses_key_vault,
         )
-        for (key, label), etag in updated_sentinel_keys.items():
-            changed, updated_sentinel = await self._check_configuration_setting(
-                key=key, label=label, etag=etag, headers=headers, **kwargs
-            )
-            if changed:
-                need_refresh = True
-            if updated_sentinel is not None:
-                updated_sentinel_keys[(key, label)] = updated_sentinel.etag
+        sentinels = list(updated_sentinel_keys.items())
+        if sentinels:
+            # The sentinel checks run concurrently; any change triggers a full reload, so the remaining probes are
+            # cancelled as soon as the first change comes back.
+            async def _check_sentinel(key, label, etag):
+                result = await self._check_configuration_setting(
+                    key=key, label=label, etag=etag, headers=headers, **kwargs
+                )
+                return (key, label), result
+
+            tasks = [asyncio.ensure_future(_check_sentinel(key, label, etag)) for (key, label), etag in sentinels]
+            try:
+                for completed in asyncio.as_completed(tasks):
+                    (key, label), (changed, updated_sentinel) = await completed
+                    if updated_sentinel is not None:
+                        updated_sentinel_keys[(key, label)] = updated_sentinel.etag
+                    if changed:
+                        need_refresh = True
+                        break
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
         # Need to only update once, no matter how many sentinels are updated
         if need_refresh:
             configuration_settings, sentinel_keys = await self._load_configuration_settings(**kwargs)
@@ -466,19 +482,35 @@ class AzureAppConfigurationProvider(Mapping[str, Union[str, JSON]]):  # pylint:
             self._feature_filter_usage,
             self._uses_key_vault,
         )
-        for (key, label), etag in feature_flag_sentinel_keys.items():
-            changed = await self._check_configuration_setting(
-                key=key, label=label, etag=etag, headers=headers, **kwargs
-            )
-            if changed:
-                feature_flags, feature_flag_sentinel_keys = await self._load_feature_flags(**kwargs)
-                with self._update_lock:
-                    updated_configurations: Dict[str, Any] = {}
-                    updated_configurations[FEATURE_MANAGEMENT_KEY] = {}
-                    updated_configurations[FEATURE_MANAGEMENT_KEY][FEATURE_FLAG_KEY] = feature_flags
-                    self._dict.update(updated_configurations)
-                self._refresh_on_feature_flags = feature_flag_sentinel_keys
-                return True
+        changed = False
+        sentinels = list(feature_flag_sentinel_keys.items())
+        if sentinels:
+            # The sentinel checks run concurrently; any change triggers a full reload, so the remaining probes are
+            # cancelled as soon as the first change comes back.
+            tasks = [
+                asyncio.ensure_future(
+                    self._check_configuration_setting(key=key, label=label, etag=etag, headers=headers, **kwargs)
+                )
+                for (key, label), etag in sentinels
+            ]
+            try:
+                for completed in asyncio.as_completed(tasks):
+                    if (await completed)[0]:
+                        changed = True
+                        break
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        if changed:
+            feature_flags, feature_flag_sentinel_keys = await self._load_feature_flags(**kwargs)
+            with self._update_lock:
+                updated_configurations: Dict[str, Any] = {}
+                updated_configurations[FEATURE_MANAGEMENT_KEY] = {}
+                updated_configurations[FEATURE_MANAGEMENT_KEY][FEATURE_FLAG_KEY] = feature_flags
+                self._dict.update(updated_configurations)
+            self._refresh_on_feature_flags = feature_flag_sentinel_keys
+            return True
         return False
 
     async def _check_configuration_setting(
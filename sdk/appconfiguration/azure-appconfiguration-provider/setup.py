@@ -77,4 +77,7 @@ setup(
         "azure-keyvault-secrets>=4.3.0",
         "dnspython>=2.6.1",
     ],
+    extras_require={
+        "orjson": ["orjson>=3.0.0"],
+    },
 )
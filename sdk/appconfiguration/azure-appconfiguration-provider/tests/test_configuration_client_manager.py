@@ -3,10 +3,14 @@
 # Licensed under the MIT License. See License.txt in the project root for
 # license information.
 # --------------------------------------------------------------------------
+import os
+import tempfile
+import time
 import pytest
 import unittest
-from unittest.mock import patch, call
-from azure.appconfiguration.provider._client_manager import ConfigurationClientManager
+from unittest.mock import patch, call, Mock
+from azure.core.exceptions import HttpResponseError
+from azure.appconfiguration.provider._client_manager import ConfigurationClientManager, _ConfigurationClientWrapper
 
 
 class MockClient:
@@ -17,6 +21,20 @@ class MockClient:
         self.credential = credential
         self.retry_total = retry_total
         self.retry_backoff = retry_backoff
+        self.backoff_end_time = 0
+        self.failed_attempts = 0
+        self.entered = False
+        self.exited = False
+
+    def __enter__(self):
+        self.entered = True
+        return self
+
+    def __exit__(self, *args):
+        self.exited = True
+
+    def close(self):
+        pass
 
 
 @pytest.mark.usefixtures("caplog")
@@ -33,7 +51,7 @@ class TestConfigurationClientManager(unittest.TestCase):
             assert (
                 str(ex.exception) == "Please pass either endpoint and credential, or a connection string with a value."
             )
-        mock_find_auto_failover_endpoints.assert_called_once_with(endpoint, False)
+        mock_find_auto_failover_endpoints.assert_not_called()
         mock_client.assert_not_called()
 
         connection_string = "Endpoint=https://fake.endpoint/;Id=fake_id;Secret=fake_secret"
@@ -41,27 +59,35 @@ class TestConfigurationClientManager(unittest.TestCase):
         mock_find_auto_failover_endpoints.reset_mock()
         mock_client.reset_mock()
 
-        # No auto failover endpoints found
-        mock_find_auto_failover_endpoints.return_value = []
+        # Only the primary client is built up front; failover discovery is deferred until it is needed
+        mock_find_auto_failover_endpoints.return_value = ["https://fake.endpoint2"]
+        mock_client.return_value = MockClient(endpoint, connection_string, None, 0, 0)
         manager = ConfigurationClientManager(connection_string, endpoint, None, "", 0, 0, False, 0, 0)
         assert manager is not None
         assert len(manager._replica_clients) == 1
-        mock_find_auto_failover_endpoints.assert_called_once_with(endpoint, False)
+        mock_find_auto_failover_endpoints.assert_not_called()
         mock_client.assert_called_once_with(endpoint, connection_string, "", 0, 0)
 
         mock_find_auto_failover_endpoints.reset_mock()
         mock_client.reset_mock()
 
-        # A single auto failover endpoint found
-        mock_find_auto_failover_endpoints.return_value = ["https://fake.endpoint2"]
-        manager = ConfigurationClientManager(connection_string, endpoint, None, "", 0, 0, False, 0, 0)
-        assert manager is not None
-        assert len(manager._replica_clients) == 2
-        mock_find_auto_failover_endpoints.assert_called_once_with(endpoint, False)
+        # Once every built client is in backoff the failover endpoints are discovered and built
         connection_string2 = "Endpoint=https://fake.endpoint2/;Id=fake_id;Secret=fake_secret"
-        mock_client.assert_has_calls(
-            [call(endpoint, connection_string, "", 0, 0), call("https://fake.endpoint2", connection_string2, "", 0, 0)]
-        )
+        mock_client.return_value = MockClient("https://fake.endpoint2", connection_string2, None, 0, 0)
+        manager._replica_clients[0].backoff_end_time = time.time() + 600
+        active_clients = list(manager.iter_active_clients())
+        mock_find_auto_failover_endpoints.assert_called_once_with(endpoint, False)
+        mock_client.assert_called_once_with("https://fake.endpoint2", connection_string2, "", 0, 0)
+        assert len(manager._replica_clients) == 2
+        assert active_clients == [manager._replica_clients[1]]
+
+        mock_find_auto_failover_endpoints.reset_mock()
+        mock_client.reset_mock()
+
+        # Discovery only happens once outside of refresh_clients
+        list(manager.iter_active_clients())
+        mock_find_auto_failover_endpoints.assert_not_called()
+        mock_client.assert_not_called()
 
     @patch("azure.appconfiguration.provider._client_manager.find_auto_failover_endpoints")
     @patch("azure.appconfiguration.provider._client_manager._ConfigurationClientWrapper.from_credential")
@@ -74,32 +100,40 @@ class TestConfigurationClientManager(unittest.TestCase):
             assert (
                 str(ex.exception) == "Please pass either endpoint and credential, or a connection string with a value."
             )
-        mock_find_auto_failover_endpoints.assert_called_once_with(endpoint, False)
+        mock_find_auto_failover_endpoints.assert_not_called()
         mock_client.assert_not_called()
 
         mock_find_auto_failover_endpoints.reset_mock()
         mock_client.reset_mock()
 
-        # No auto failover endpoints found
-        mock_find_auto_failover_endpoints.return_value = []
+        # Only the primary client is built up front; failover discovery is deferred until it is needed
+        mock_find_auto_failover_endpoints.return_value = ["https://fake.endpoint2"]
+        mock_client.return_value = MockClient(endpoint, "", "fake-credential", 0, 0)
         manager = ConfigurationClientManager(None, endpoint, "fake-credential", "", 0, 0, False, 0, 0)
         assert manager is not None
         assert len(manager._replica_clients) == 1
-        mock_find_auto_failover_endpoints.assert_called_once_with(endpoint, False)
+        mock_find_auto_failover_endpoints.assert_not_called()
         mock_client.assert_called_once_with(endpoint, "fake-credential", "", 0, 0)
 
         mock_find_auto_failover_endpoints.reset_mock()
         mock_client.reset_mock()
 
-        # A single auto failover endpoint found
-        mock_find_auto_failover_endpoints.return_value = ["https://fake.endpoint2"]
-        manager = ConfigurationClientManager(None, endpoint, "fake-credential", "", 0, 0, False, 0, 0)
-        assert manager is not None
-        assert len(manager._replica_clients) == 2
+        # Once every built client is in backoff the failover endpoints are discovered and built
+        mock_client.return_value = MockClient("https://fake.endpoint2", "", "fake-credential", 0, 0)
+        manager._replica_clients[0].backoff_end_time = time.time() + 600
+        active_clients = list(manager.iter_active_clients())
         mock_find_auto_failover_endpoints.assert_called_once_with(endpoint, False)
-        mock_client.assert_has_calls(
-            [call(endpoint, "fake-credential", "", 0, 0), call("https://fake.endpoint2", "fake-credential", "", 0, 0)]
-        )
+        mock_client.assert_called_once_with("https://fake.endpoint2", "fake-credential", "", 0, 0)
+        assert len(manager._replica_clients) == 2
+        assert active_clients == [manager._replica_clients[1]]
+
+        mock_find_auto_failover_endpoints.reset_mock()
+        mock_client.reset_mock()
+
+        # Discovery only happens once outside of refresh_clients
+        list(manager.iter_active_clients())
+        mock_find_auto_failover_endpoints.assert_not_called()
+        mock_client.assert_not_called()
 
     @patch("azure.appconfiguration.provider._client_manager.find_auto_failover_endpoints")
     @patch("azure.appconfiguration.provider._client_manager._ConfigurationClientWrapper.from_credential")
@@ -302,3 +336,204 @@ class TestConfigurationClientManager(unittest.TestCase):
         assert 30000.0 <= manager._calculate_backoff(10) <= 600000.0
 
         assert manager_invalid._calculate_backoff(0) == 600000
+
+    @patch("azure.appconfiguration.provider._client_manager.find_auto_failover_endpoints")
+    @patch("azure.appconfiguration.provider._client_manager._ConfigurationClientWrapper.from_credential")
+    def test_backoff_index_drained(self, mock_client, mock_find_auto_failover_endpoints):
+        endpoint = "https://fake.endpoint"
+        mock_find_auto_failover_endpoints.return_value = []
+        mock_client.return_value = MockClient(endpoint, "", "fake-credential", 0, 0)
+        # A zero min/max backoff expires each entry immediately
+        manager = ConfigurationClientManager(None, endpoint, "fake-credential", "", 0, 0, False, 0, 0)
+        client = manager._replica_clients[0]
+
+        for _ in range(3):
+            manager.backoff(client)
+        assert len(manager._backoff_heap) == 3
+
+        # Iterating the active clients releases the expired entries instead of letting the index grow
+        assert list(manager.iter_active_clients()) == [client]
+        assert manager._backoff_heap == []
+        assert manager._backed_off_ids == set()
+        assert manager.get_active_clients() == [client]
+
+    @patch("azure.appconfiguration.provider._client_manager.find_auto_failover_endpoints")
+    @patch("azure.appconfiguration.provider._client_manager._ConfigurationClientWrapper.from_credential")
+    def test_lazily_built_clients_closed_on_exit(self, mock_client, mock_find_auto_failover_endpoints):
+        endpoint = "https://fake.endpoint"
+        mock_find_auto_failover_endpoints.return_value = ["https://fake.endpoint2"]
+        primary = MockClient(endpoint, "", "fake-credential", 0, 0)
+        mock_client.return_value = primary
+        manager = ConfigurationClientManager(None, endpoint, "fake-credential", "", 0, 0, False, 0, 0)
+
+        with manager:
+            assert primary.entered
+
+            # A failover client built inside the manager context joins the exit stack
+            failover = MockClient("https://fake.endpoint2", "", "fake-credential", 0, 0)
+            mock_client.return_value = failover
+            primary.backoff_end_time = time.time() + 600
+            list(manager.iter_active_clients())
+            assert failover.entered
+            assert not failover.exited
+
+        assert primary.exited
+        assert failover.exited
+
+    @patch("azure.appconfiguration.provider._client_manager.find_auto_failover_endpoints")
+    @patch("azure.appconfiguration.provider._client_manager._ConfigurationClientWrapper.from_credential")
+    def test_etag_cache_round_trip(self, mock_client, mock_find_auto_failover_endpoints):
+        endpoint = "https://fake.endpoint"
+        mock_find_auto_failover_endpoints.return_value = []
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache_path = os.path.join(cache_dir, "etags.json")
+            manager = ConfigurationClientManager(
+                None, endpoint, "fake-credential", "", 0, 0, False, 0, 0, etag_cache_path=cache_path
+            )
+
+            # No cache file yet, the sentinels are returned untouched
+            sentinels = {("my_key", "my_label"): None, ("other_key", "\0"): None}
+            assert manager.load_cached_sentinel_etags(sentinels) == sentinels
+
+            manager.save_sentinel_etags({("my_key", "my_label"): "etag-1", ("other_key", "\0"): None})
+            assert os.path.isfile(cache_path)
+
+            # A fresh manager picks up the persisted etags, leaving unknown sentinels untouched
+            restarted_manager = ConfigurationClientManager(
+                None, endpoint, "fake-credential", "", 0, 0, False, 0, 0, etag_cache_path=cache_path
+            )
+            loaded = restarted_manager.load_cached_sentinel_etags(sentinels)
+            assert loaded[("my_key", "my_label")] == "etag-1"
+            assert loaded[("other_key", "\0")] is None
+
+            # A cache file that isn't a JSON object is ignored, not raised
+            with open(cache_path, "wb") as cache_file:
+                cache_file.write(b"[]")
+            assert restarted_manager.load_cached_sentinel_etags(sentinels) == sentinels
+
+            # As is one that isn't JSON at all
+            with open(cache_path, "wb") as cache_file:
+                cache_file.write(b"not json")
+            assert restarted_manager.load_cached_sentinel_etags(sentinels) == sentinels
+
+    @patch("azure.appconfiguration.provider._client_manager.find_auto_failover_endpoints")
+    @patch("azure.appconfiguration.provider._client_manager._ConfigurationClientWrapper.from_credential")
+    def test_etag_cache_disabled(self, mock_client, mock_find_auto_failover_endpoints):
+        endpoint = "https://fake.endpoint"
+        mock_find_auto_failover_endpoints.return_value = []
+        manager = ConfigurationClientManager(None, endpoint, "fake-credential", "", 0, 0, False, 0, 0)
+
+        # Without a cache path both operations are no-ops
+        sentinels = {("my_key", "my_label"): None}
+        assert manager.load_cached_sentinel_etags(sentinels) == sentinels
+        manager.save_sentinel_etags({("my_key", "my_label"): "etag-1"})
+
+
+def _mock_page_response(etag):
+    return Mock(http_response=Mock(headers={"ETag": etag} if etag else {}))
+
+
+class TestConfigurationClientWrapper(unittest.TestCase):
+
+    def test_list_configuration_settings_returns_cache_on_304(self):
+        wrapper = _ConfigurationClientWrapper("https://fake.endpoint", Mock())
+        settings = [Mock(key="my_key"), Mock(key="other_key")]
+
+        def list_configuration_settings(**kwargs):
+            if (kwargs.get("headers") or {}).get("If-None-Match") == '"page-etag"':
+                error = HttpResponseError(message="Not Modified")
+                error.status_code = 304
+                raise error
+            kwargs["raw_response_hook"](_mock_page_response('"page-etag"'))
+            return iter(settings)
+
+        wrapper._client.list_configuration_settings.side_effect = list_configuration_settings
+
+        # The first request has nothing cached and downloads the page
+        assert wrapper._list_configuration_settings("key*", "my_label") == settings
+
+        # The second request sends If-None-Match and serves the cached settings on 304
+        assert wrapper._list_configuration_settings("key*", "my_label") == settings
+        assert wrapper._client.list_configuration_settings.call_count == 2
+        sent_headers = wrapper._client.list_configuration_settings.call_args.kwargs["headers"]
+        assert sent_headers["If-None-Match"] == '"page-etag"'
+
+    def test_list_configuration_settings_multi_page_not_cached(self):
+        wrapper = _ConfigurationClientWrapper("https://fake.endpoint", Mock())
+        settings = [Mock(key="my_key"), Mock(key="other_key")]
+        page_etags = [['"page-etag"'], ['"page-1"', '"page-2"'], ['"page-1"', '"page-2"']]
+
+        def list_configuration_settings(**kwargs):
+            for page_etag in page_etags.pop(0):
+                kwargs["raw_response_hook"](_mock_page_response(page_etag))
+            return iter(settings)
+
+        wrapper._client.list_configuration_settings.side_effect = list_configuration_settings
+
+        # A single-page response is cached
+        wrapper._list_configuration_settings("key*", "my_label")
+        assert wrapper._list_etags == {("key*", "my_label"): '"page-etag"'}
+
+        # A page etag only covers its own page, so a multi-page response invalidates the cache
+        assert wrapper._list_configuration_settings("key*", "my_label") == settings
+        assert wrapper._list_etags == {}
+        assert wrapper._list_cache == {}
+
+        # With nothing cached the next request is unconditional
+        wrapper._list_configuration_settings("key*", "my_label")
+        sent_headers = wrapper._client.list_configuration_settings.call_args.kwargs["headers"]
+        assert "If-None-Match" not in sent_headers
+
+    def test_check_configuration_settings_batched_fallbacks(self):
+        wrapper = _ConfigurationClientWrapper("https://fake.endpoint", Mock())
+
+        # A single sentinel isn't worth a list request
+        assert wrapper._check_configuration_settings_batched([(("my_key", "label"), "etag-1")], {}, {}) is None
+
+        # Sentinels with different labels can't share one label filter
+        sentinels = [(("my_key", "label"), "etag-1"), (("other_key", "other_label"), "etag-2")]
+        assert wrapper._check_configuration_settings_batched(sentinels, {}, {}) is None
+
+        # A label containing filter syntax, or no label at all, would change matching semantics
+        for label in ("lab,el", "lab*el", "lab\\el", ""):
+            sentinels = [(("my_key", label), "etag-1"), (("other_key", label), "etag-2")]
+            assert wrapper._check_configuration_settings_batched(sentinels, {}, {}) is None
+
+        # A key containing filter syntax can't go into a comma-separated key filter
+        for key in ("my,key", "my*key", "my\\key"):
+            sentinels = [((key, "label"), "etag-1"), (("other_key", "label"), "etag-2")]
+            assert wrapper._check_configuration_settings_batched(sentinels, {}, {}) is None
+
+        # A joined key filter over the service limit falls back too
+        sentinels = [(("k" * 200, "label"), "etag-1"), (("j" * 200, "label"), "etag-2")]
+        assert wrapper._check_configuration_settings_batched(sentinels, {}, {}) is None
+
+        wrapper._client.list_configuration_settings.assert_not_called()
+
+    def test_check_configuration_settings_batched(self):
+        wrapper = _ConfigurationClientWrapper("https://fake.endpoint", Mock())
+        listed = [Mock(key="my_key", etag="etag-1-new"), Mock(key="other_key", etag="etag-2")]
+
+        def list_configuration_settings(**kwargs):
+            kwargs["raw_response_hook"](_mock_page_response(None))
+            return iter(listed)
+
+        wrapper._client.list_configuration_settings.side_effect = list_configuration_settings
+
+        sentinels = [
+            (("my_key", "label"), "etag-1"),
+            (("other_key", "label"), "etag-2"),
+            (("deleted_key", "label"), "etag-3"),
+        ]
+        updated_sentinel_keys = {}
+        assert wrapper._check_configuration_settings_batched(sentinels, updated_sentinel_keys, {}) is True
+        # The changed sentinel gets its new etag recorded; the deleted one only triggers the refresh
+        assert updated_sentinel_keys == {("my_key", "label"): "etag-1-new"}
+        call_kwargs = wrapper._client.list_configuration_settings.call_args.kwargs
+        assert call_kwargs["key_filter"] == "my_key,other_key,deleted_key"
+        assert call_kwargs["label_filter"] == "label"
+
+        # Unchanged etags mean no refresh
+        sentinels = [(("my_key", "label"), "etag-1-new"), (("other_key", "label"), "etag-2")]
+        assert wrapper._check_configuration_settings_batched(sentinels, {}, {}) is False